@@ -8,8 +8,9 @@ import torch
 import numpy as np
 import torch.distributed as dist
 from torchvision import datasets, transforms
+from torchvision.transforms import v2
 from timm.data.constants import IMAGENET_DEFAULT_MEAN, IMAGENET_DEFAULT_STD
-from timm.data import Mixup
+from timm.data import Mixup, FastCollateMixup
 from timm.data import create_transform
 from train.logger import create_logger
 try:
@@ -18,75 +19,135 @@ except:
     from timm.data.transforms import _pil_interp
 from .cached_image_folder import CachedImageFolder
 from .samplers import SubsetRandomSampler
+from .custom_dataset import CustomDataset, MMAPDataset
+from .gpu_loaders import CUDAPrefetcher, CUDATensorLoader, DALILoader
+from .tensor_transforms import FusedNormalize, compose_scripted
 import os 
-from PIL import Image
-from torch.utils.data import Dataset
-
-
-
-class CustomDataset(Dataset):
-    """this data set accept the data in yolo format"""
-    def __init__(self, image_dir, label_dir, transform=None):
-        self.image_dir = image_dir
-        self.label_dir = label_dir
-        self.transform = transform
-        self.image_filenames = [f for f in os.listdir(image_dir) if f.endswith('.jpg') or f.endswith('.png')]
-
-    def __len__(self):
-        return len(self.image_filenames)
-
-    def __getitem__(self, idx):
-        image_filename = self.image_filenames[idx]
-        image_path = os.path.join(self.image_dir, image_filename)
-        label_path = os.path.join(self.label_dir, os.path.splitext(image_filename)[0] + '.txt')
-
-        # Load image
-        image = Image.open(image_path).convert('RGB')
-        width, height = image.size
-
-        # Load and parse label
-        with open(label_path, 'r') as f:
-            line = f.readline().strip()
-            class_id, cx, cy, bw, bh = map(float, line.split())
-            class_id = int(class_id)
-
-        # Convert normalized bbox to pixel coordinates
-        cx *= width
-        cy *= height
-        bw *= width
-        bh *= height
-
-        x1 = int(cx - bw / 2)
-        y1 = int(cy - bh / 2)
-        x2 = int(cx + bw / 2)
-        y2 = int(cy + bh / 2)
-
-        # Crop face
-        img = image.crop((x1, y1, x2, y2))
-
-        if self.transform:
-            img = self.transform(img)
-
-        return img, class_id
-
-
+import glob
+import tarfile
+try:
+    from nvidia.dali import fn, types
+    from nvidia.dali.pipeline import Pipeline
+    from nvidia.dali.plugin.pytorch import DALIClassificationIterator, LastBatchPolicy
+except ImportError:
+    Pipeline = None
+try:
+    import webdataset as wds
+except ImportError:
+    wds = None
+
+CIFAR100_DEFAULT_MEAN = (0.5070751592371323, 0.48654887331495095, 0.4409178433670343)
+CIFAR100_DEFAULT_STD = (0.2673342858792401, 0.2564384629170883, 0.27615047132568404)
+CUSTOM_DEFAULT_MEAN = (0.5441, 0.4334, 0.3817)
+CUSTOM_DEFAULT_STD = (0.2558, 0.2304, 0.2223)
+
+
+def _check_dali_aug(config):
+    # the DALI train pipeline only does random resized crop + flip, i.e. the 'weak' preset, refuse anything else
+    # rather than silently training with a different recipe
+    assert config.DATA.IMG_SIZE > 32, "DALI loading has no RandomCrop(padding=4) path for IMG_SIZE <= 32"
+    if config.AUG.PRESET is None:
+        assert config.AUG.AUTO_AUGMENT == 'none' and config.AUG.COLOR_JITTER == 0 and config.AUG.REPROB == 0, \
+            "DALI loading does not implement AUG.AUTO_AUGMENT, AUG.COLOR_JITTER or AUG.REPROB, " \
+            "set them to none/0 or use AUG.PRESET weak"
+    else:
+        assert config.AUG.PRESET.strip() == 'weak', f"DALI loading does not implement AUG.PRESET {config.AUG.PRESET}"
+
+
+def _build_dali_loader(config, is_train, num_tasks, global_rank):
+    assert Pipeline is not None, "DALI not installed!"
+    assert config.DATA.DATASET == 'imagenet', "DALI loading is only implemented for ImageNet"
+    batch_size = config.DATA.BATCH_SIZE if is_train else config.DATA.TEST_BATCH_SIZE
+    num_workers = config.DATA.NUM_WORKERS if config.DATA.NUM_WORKERS > 0 else 4
+    pipe = Pipeline(batch_size=batch_size, num_threads=num_workers, device_id=config.LOCAL_RANK,
+                    seed=config.SEED + global_rank)
+    with pipe:
+        jpegs, labels = fn.readers.file(file_root=os.path.join(config.DATA.DATA_PATH, 'train' if is_train else 'val'),
+                                        shard_id=global_rank, num_shards=num_tasks,
+                                        random_shuffle=is_train, pad_last_batch=not is_train, name='Reader')
+        images = fn.decoders.image(jpegs, device='mixed', output_type=types.RGB)
+        if is_train:
+            images = fn.random_resized_crop(images, device='gpu', size=config.DATA.IMG_SIZE)
+            mirror = fn.random.coin_flip()
+            crop = (config.DATA.IMG_SIZE, config.DATA.IMG_SIZE)
+        else:
+            size = int((256 / 224) * config.DATA.TEST_SIZE) if config.TEST.CROP else config.DATA.TEST_SIZE
+            images = fn.resize(images, device='gpu', resize_shorter=size)
+            mirror = False
+            crop = (config.DATA.TEST_SIZE, config.DATA.TEST_SIZE)
+        images = fn.crop_mirror_normalize(images, dtype=types.FLOAT, output_layout='CHW', crop=crop,
+                                          mean=[m * 255 for m in IMAGENET_DEFAULT_MEAN],
+                                          std=[s * 255 for s in IMAGENET_DEFAULT_STD],
+                                          mirror=mirror)
+        pipe.set_outputs(images, labels.gpu())
+    pipe.build()
+    iterator = DALIClassificationIterator(pipe, reader_name='Reader', auto_reset=True,
+                                          last_batch_policy=LastBatchPolicy.DROP if is_train else LastBatchPolicy.PARTIAL)
+    return DALILoader(iterator)
+
+
+class _MixupCollate:
+    """collate_fn running FastCollateMixup in the DataLoader workers on uint8 (C, H, W) samples"""
+    def __init__(self, mixup):
+        self.mixup = mixup
+
+    def __call__(self, batch):
+        return self.mixup([(np.asarray(img), target) for img, target in batch])
+
+
+def _build_mixup(config, fast_collate=False):
+    mixup_fn = None
+    mixup_active = config.AUG.MIXUP > 0 or config.AUG.CUTMIX > 0. or config.AUG.CUTMIX_MINMAX is not None
+    if mixup_active:
+        mixup_cls = FastCollateMixup if fast_collate else Mixup
+        mixup_fn = mixup_cls(
+            mixup_alpha=config.AUG.MIXUP, cutmix_alpha=config.AUG.CUTMIX, cutmix_minmax=config.AUG.CUTMIX_MINMAX,
+            prob=config.AUG.MIXUP_PROB, switch_prob=config.AUG.MIXUP_SWITCH_PROB, mode=config.AUG.MIXUP_MODE,
+            label_smoothing=config.MODEL.LABEL_SMOOTHING, num_classes=config.MODEL.NUM_CLASSES)
+    return mixup_fn
 
 
 def build_loader(config):
-    logger = create_logger(output_dir=config.OUTPUT, dist_rank=0 if torch.cuda.device_count() == 1 else dist.get_rank(), name=f"{config.MODEL.ARCH}")
+    num_tasks = dist.get_world_size()
+    global_rank = dist.get_rank()
+    logger = create_logger(output_dir=config.OUTPUT, dist_rank=0 if torch.cuda.device_count() == 1 else global_rank, name=f"{config.MODEL.ARCH}")
+    if config.DATA.USE_DALI:
+        _check_dali_aug(config)
+        logger.info(f"DALI train augmentation: random resized crop {config.DATA.IMG_SIZE}, horizontal flip, normalize")
+        config.defrost()
+        config.MODEL.NUM_CLASSES = 1000
+        config.freeze()
+        data_loader_train = _build_dali_loader(config, is_train=True, num_tasks=num_tasks, global_rank=global_rank)
+        data_loader_val = _build_dali_loader(config, is_train=False, num_tasks=num_tasks, global_rank=global_rank)
+        logger.info(f"DALI data_loader train:{len(data_loader_train)} val:{len(data_loader_val)}")
+        return None, None, data_loader_train, data_loader_val, _build_mixup(config)
+
     config.defrost()
-    dataset_train, config.MODEL.NUM_CLASSES = build_dataset(is_train=True, config=config)
+    dataset_train, config.MODEL.NUM_CLASSES = build_dataset(is_train=True, config=config, logger=logger,
+                                                            num_tasks=num_tasks, global_rank=global_rank)
     config.freeze()
-    logger.info(f"local rank {config.LOCAL_RANK} / global rank {dist.get_rank()} successfully build train dataset")
-    dataset_val, _ = build_dataset(is_train=False, config=config)
-    logger.info(f"local rank {config.LOCAL_RANK} / global rank {dist.get_rank()} successfully build val dataset")
+    logger.info(f"local rank {config.LOCAL_RANK} / global rank {global_rank} successfully build train dataset")
+    dataset_val, _ = build_dataset(is_train=False, config=config, logger=logger,
+                                   num_tasks=num_tasks, global_rank=global_rank)
+    logger.info(f"local rank {config.LOCAL_RANK} / global rank {global_rank} successfully build val dataset")
 
-    num_tasks = dist.get_world_size()
     logger.info(f"num task:{num_tasks}")
-    global_rank = dist.get_rank()
     logger.info(f"global rank:{global_rank}")
-    if config.DATA.ZIP_MODE and config.DATA.CACHE_MODE == 'part':
-        indices = np.arange(dist.get_rank(), len(dataset_train), dist.get_world_size())
+    if config.DATA.DATASET == 'cf100' and torch.cuda.is_available():
+        # the whole of CIFAR-100 fits on the GPU, batches are sliced, augmented and normalized there
+        data_loader_train = CUDATensorLoader(dataset_train.data, dataset_train.targets, config.DATA.BATCH_SIZE,
+                                             CIFAR100_DEFAULT_MEAN, CIFAR100_DEFAULT_STD, train=True,
+                                             num_replicas=num_tasks, rank=global_rank)
+        data_loader_val = CUDATensorLoader(dataset_val.data, dataset_val.targets, config.DATA.TEST_BATCH_SIZE,
+                                           CIFAR100_DEFAULT_MEAN, CIFAR100_DEFAULT_STD, train=False,
+                                           num_replicas=num_tasks, rank=global_rank)
+        return dataset_train, dataset_val, data_loader_train, data_loader_val, _build_mixup(config)
+
+    if isinstance(dataset_train, torch.utils.data.IterableDataset):
+        # e.g. WebDataset shards, which are split per rank by the dataset itself
+        sampler_train = None
+    elif config.DATA.ZIP_MODE and config.DATA.CACHE_MODE == 'part':
+        indices = np.arange(global_rank, len(dataset_train), num_tasks)
         sampler_train = SubsetRandomSampler(indices)
     else:
         sampler_train = torch.utils.data.DistributedSampler(
@@ -96,17 +157,31 @@ def build_loader(config):
     if dataset_val is None:
         sampler_val = None
     else:
-        indices = np.arange(dist.get_rank(), len(dataset_val), dist.get_world_size())   #TODO
-        logger.info(f"indices:{indices}")
-        sampler_val = SubsetRandomSampler(indices)
+        sampler_val = torch.utils.data.DistributedSampler(
+            dataset_val, num_replicas=num_tasks, rank=global_rank, shuffle=False, drop_last=False
+        )
         logger.info(f"sampler val:{sampler_val}")
 
+    num_workers = _num_workers(config)
+    logger.info(f"num workers:{num_workers}")
+    loader_kwargs = dict(num_workers=num_workers, pin_memory=config.DATA.PIN_MEMORY,
+                         persistent_workers=num_workers > 0)
+    if num_workers > 0:
+        loader_kwargs['prefetch_factor'] = 2
+
+    # setup mixup / cutmix, batches that are normalized on the GPU are still uint8 and get mixed in the workers
+    mixup_fn = _build_mixup(config, fast_collate=_gpu_normalize(config))
+    collate_fn = None
+    if isinstance(mixup_fn, FastCollateMixup):
+        collate_fn = _MixupCollate(mixup_fn)
+        mixup_fn = None
+
     data_loader_train = torch.utils.data.DataLoader(
         dataset_train, sampler=sampler_train,
         batch_size=config.DATA.BATCH_SIZE,
-        num_workers=config.DATA.NUM_WORKERS,
-        pin_memory=config.DATA.PIN_MEMORY,
         drop_last=True,
+        collate_fn=collate_fn,
+        **loader_kwargs,
     )
 
     if dataset_val is None:
@@ -116,29 +191,66 @@ def build_loader(config):
             dataset_val, sampler=sampler_val,
             batch_size=config.DATA.TEST_BATCH_SIZE,
             shuffle=False,
-            num_workers=config.DATA.NUM_WORKERS,
-            pin_memory=config.DATA.PIN_MEMORY,
-            drop_last=False
+            drop_last=False,
+            **loader_kwargs,
         )
         logger.info(f"data_loader val:{len(data_loader_val)}")
-    # setup mixup / cutmix
-    mixup_fn = None
-    mixup_active = config.AUG.MIXUP > 0 or config.AUG.CUTMIX > 0. or config.AUG.CUTMIX_MINMAX is not None
-    if mixup_active:
-        mixup_fn = Mixup(
-            mixup_alpha=config.AUG.MIXUP, cutmix_alpha=config.AUG.CUTMIX, cutmix_minmax=config.AUG.CUTMIX_MINMAX,
-            prob=config.AUG.MIXUP_PROB, switch_prob=config.AUG.MIXUP_SWITCH_PROB, mode=config.AUG.MIXUP_MODE,
-            label_smoothing=config.MODEL.LABEL_SMOOTHING, num_classes=config.MODEL.NUM_CLASSES)
+
+    if torch.cuda.is_available():
+        mean, std = (CUSTOM_DEFAULT_MEAN, CUSTOM_DEFAULT_STD) if _gpu_normalize(config) else (None, None)
+        data_loader_train = CUDAPrefetcher(data_loader_train, mean=mean, std=std)
+        if data_loader_val is not None:
+            data_loader_val = CUDAPrefetcher(data_loader_val, mean=mean, std=std)
 
     return dataset_train, dataset_val, data_loader_train, data_loader_val, mixup_fn
 
 
-def build_dataset(is_train, config):
-    logger = create_logger(output_dir=config.OUTPUT, dist_rank=0 if torch.cuda.device_count() == 1 else dist.get_rank(), name=f"{config.MODEL.ARCH}")
+def _num_workers(config):
+    if config.DATA.NUM_WORKERS < 0:
+        # cpu_count is per machine, so share it between the ranks of this node, not the global world size
+        local_world_size = int(os.environ.get('LOCAL_WORLD_SIZE', torch.cuda.device_count() or 1))
+        return min(max((os.cpu_count() or 1) // local_world_size - 1, 1), 8)
+    return config.DATA.NUM_WORKERS
+
+
+def _count_wds_samples(shards):
+    # only the tar headers are read, tarfile seeks over the member data
+    num_samples = 0
+    for shard in shards:
+        with tarfile.open(shard) as tar:
+            num_samples += sum(1 for member in tar if member.name.endswith('.cls'))
+    return num_samples
+
+
+def _gpu_normalize(config):
+    return config.DATA.GPU_NORMALIZE and config.DATA.DATASET == 'custom' and torch.cuda.is_available()
+
+
+def build_dataset(is_train, config, logger, num_tasks, global_rank):
     if config.DATA.DATASET == 'imagenet':
         transform = build_transform(is_train, config)
         prefix = 'train' if is_train else 'val'
-        if config.DATA.ZIP_MODE:
+        if config.DATA.WDS_MODE and is_train:
+            # validation keeps the sampler-based datasets below, which visit every sample exactly once
+            assert wds is not None, "webdataset not installed!"
+            shards = sorted(glob.glob(os.path.join(config.DATA.DATA_PATH, prefix, '*.tar')))
+            num_samples = config.DATA.WDS_TRAIN_SAMPLES
+            if not num_samples:
+                # walk the tar headers on rank 0 only and share the count, the other ranks do no extra reads
+                counted = [_count_wds_samples(shards) if global_rank == 0 else 0]
+                dist.broadcast_object_list(counted, src=0)
+                num_samples = counted[0]
+                logger.info(f"counted {num_samples} samples in {len(shards)} shards, "
+                            f"set DATA.WDS_TRAIN_SAMPLES to skip this")
+            # every worker of every rank draws shards with replacement and stops after the same number of samples,
+            # so all ranks yield exactly the same number of full batches and DDP never waits on a finished rank
+            num_workers = max(_num_workers(config), 1)
+            per_worker = num_samples // (num_tasks * num_workers * config.DATA.BATCH_SIZE) * config.DATA.BATCH_SIZE
+            assert per_worker > 0, f"{num_samples} samples are fewer than one batch per worker"
+            dataset = (wds.WebDataset(shards, resampled=True).shuffle(1000)
+                       .decode('pil').to_tuple('jpg', 'cls').map_tuple(transform, int)
+                       .with_epoch(per_worker).with_length(per_worker * num_workers))
+        elif config.DATA.ZIP_MODE:
             ann_file = prefix + "_map.txt"
             prefix = prefix + ".zip@/"
             dataset = CachedImageFolder(config.DATA.DATA_PATH, ann_file, prefix, transform,
@@ -150,60 +262,42 @@ def build_dataset(is_train, config):
         nb_classes = 1000
 
     elif config.DATA.DATASET == 'cf100':
-        mean = [0.5070751592371323, 0.48654887331495095, 0.4409178433670343]
-        std = [0.2673342858792401, 0.2564384629170883, 0.27615047132568404]
+        mean = CIFAR100_DEFAULT_MEAN
+        std = CIFAR100_DEFAULT_STD
         if is_train:
-            transform = transforms.Compose([
-                transforms.RandomCrop(32, padding=4),
-                transforms.RandomHorizontalFlip(),
-                transforms.ToTensor(),
-                transforms.Normalize(mean, std)
+            transform = v2.Compose([
+                v2.ToImage(),
+                v2.RandomCrop(32, padding=4),
+                v2.RandomHorizontalFlip(),
+                FusedNormalize(mean, std)
             ])
             dataset = datasets.CIFAR100(root=config.DATA.DATA_PATH, train=True, download=True, transform=transform)
         else:
-            transform = transforms.Compose(
-                [transforms.ToTensor(),
-                 transforms.Normalize(mean, std)])
+            transform = v2.Compose(
+                [v2.ToImage(),
+                 FusedNormalize(mean, std)])
             dataset = datasets.CIFAR100(root=config.DATA.DATA_PATH, train=False, download=True, transform=transform)
         nb_classes = 100
     elif config.DATA.DATASET == 'custom':
-        mean=[0.5441, 0.4334, 0.3817]
-        std=[0.2558, 0.2304, 0.2223]
-        transform = transform = transforms.Compose([
-                transforms.Resize(96),
-                transforms.CenterCrop(96),
-                transforms.ToTensor(),
-                transforms.Normalize(mean=mean,
-                                    std=std),
-                ])
-        if is_train:
-            train_path = os.path.join(config.DATA.DATA_PATH, 'train')
-            dir_list = []
-            for dir in os.listdir(train_path):
-                if dir == 'images':
-                    dir_list.append(os.path.join(train_path,dir))
-                if dir == 'labels':
-                    dir_list.append(os.path.join(train_path, dir))
-
-            dataset = CustomDataset(image_dir=dir_list[1],
-                                    label_dir=dir_list[0],
-                                    transform=transform)
-            logger.info(f"train data len:{len(dataset)}")
+        assert not config.DATA.SHM_CACHE or _gpu_normalize(config), "SHM_CACHE stores uint8 crops, it needs GPU_NORMALIZE"
+        t = []
+        if not config.DATA.MMAP_MODE:
+            # crops packed by tools/prepack.py are already resized and center cropped
+            t += [v2.Resize(96, antialias=True), v2.CenterCrop(96)]
+        if not _gpu_normalize(config):
+            # otherwise uint8 crops are shipped and CUDAPrefetcher normalizes them on the GPU
+            t.append(FusedNormalize(CUSTOM_DEFAULT_MEAN, CUSTOM_DEFAULT_STD))
+        transform = compose_scripted(t)
+        root = os.path.join(config.DATA.DATA_PATH, 'train' if is_train else 'valid')
+        if config.DATA.MMAP_MODE:
+            dataset = MMAPDataset(root, transform=transform)
         else:
-            
-            valid_path = os.path.join(config.DATA.DATA_PATH, 'valid')
-            
-            dir_list = []
-            for dir in os.listdir(valid_path):
-                if dir == 'images':
-                    dir_list.append(os.path.join(valid_path, dir))
-                if dir == 'labels':
-                    dir_list.append(os.path.join(valid_path, dir))
-            
-            dataset = CustomDataset(image_dir=dir_list[1],
-                                    label_dir=dir_list[0],
-                                    transform=transform)
-            logger.info(f"vald data len:{len(dataset)}")
+            dataset = CustomDataset(image_dir=os.path.join(root, 'images'),
+                                    label_dir=os.path.join(root, 'labels'),
+                                    transform=transform, img_size=96,
+                                    cache_shape=(3, 96, 96) if config.DATA.SHM_CACHE else None,
+                                    io_depth=config.DATA.IO_DEPTH if is_train else 0)
+        logger.info(f"{'train' if is_train else 'vald'} data len:{len(dataset)}")
 
         nb_classes = 8
     else:
@@ -246,18 +340,18 @@ def build_transform(is_train, config):
             print('---------------------- RAND AUG 15 distortion!')
 
         elif config.AUG.PRESET.strip() == 'weak':
-            transform = transforms.Compose([
-                transforms.RandomResizedCrop(config.DATA.IMG_SIZE),
-                transforms.RandomHorizontalFlip(),
-                transforms.ToTensor(),
-                transforms.Normalize(IMAGENET_DEFAULT_MEAN, IMAGENET_DEFAULT_STD),
+            transform = v2.Compose([
+                v2.ToImage(),
+                v2.RandomResizedCrop(config.DATA.IMG_SIZE, antialias=True),
+                v2.RandomHorizontalFlip(),
+                FusedNormalize(IMAGENET_DEFAULT_MEAN, IMAGENET_DEFAULT_STD),
             ])
         elif config.AUG.PRESET.strip() == 'none':
-            transform = transforms.Compose([
-                transforms.Resize(config.DATA.IMG_SIZE, interpolation=_pil_interp(config.DATA.INTERPOLATION)),
-                transforms.CenterCrop(config.DATA.IMG_SIZE),
-                transforms.ToTensor(),
-                transforms.Normalize(IMAGENET_DEFAULT_MEAN, IMAGENET_DEFAULT_STD),
+            transform = v2.Compose([
+                v2.ToImage(),
+                v2.Resize(config.DATA.IMG_SIZE, interpolation=_pil_interp(config.DATA.INTERPOLATION), antialias=True),
+                v2.CenterCrop(config.DATA.IMG_SIZE),
+                FusedNormalize(IMAGENET_DEFAULT_MEAN, IMAGENET_DEFAULT_STD),
             ])
         else:
             raise ValueError('???' + config.AUG.PRESET)
@@ -268,15 +362,14 @@ def build_transform(is_train, config):
     if resize_im:
         if config.TEST.CROP:
             size = int((256 / 224) * config.DATA.TEST_SIZE)
-            t.append(transforms.Resize(size, interpolation=_pil_interp(config.DATA.INTERPOLATION)),
+            t.append(v2.Resize(size, interpolation=_pil_interp(config.DATA.INTERPOLATION), antialias=True),
                 # to maintain same ratio w.r.t. 224 images
             )
-            t.append(transforms.CenterCrop(config.DATA.TEST_SIZE))
+            t.append(v2.CenterCrop(config.DATA.TEST_SIZE))
         else:
             #   default for testing
-            t.append(transforms.Resize(config.DATA.TEST_SIZE, interpolation=_pil_interp(config.DATA.INTERPOLATION)))
-            t.append(transforms.CenterCrop(config.DATA.TEST_SIZE))
-    t.append(transforms.ToTensor())
-    t.append(transforms.Normalize(IMAGENET_DEFAULT_MEAN, IMAGENET_DEFAULT_STD))
-    trans = transforms.Compose(t)
+            t.append(v2.Resize(config.DATA.TEST_SIZE, interpolation=_pil_interp(config.DATA.INTERPOLATION), antialias=True))
+            t.append(v2.CenterCrop(config.DATA.TEST_SIZE))
+    t.append(FusedNormalize(IMAGENET_DEFAULT_MEAN, IMAGENET_DEFAULT_STD))
+    trans = compose_scripted(t)
     return trans
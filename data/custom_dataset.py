@@ -0,0 +1,234 @@
+import os
+import io
+import shutil
+import hashlib
+from concurrent.futures import ThreadPoolExecutor
+from multiprocessing import resource_tracker
+from multiprocessing.shared_memory import SharedMemory
+import numpy as np
+import torch
+import torch.distributed as dist
+from PIL import Image
+from torch.utils.data import Dataset
+try:
+    from turbojpeg import TurboJPEG, TJPF_RGB
+    _tj = TurboJPEG()
+except (ImportError, RuntimeError):
+    # PyTurboJPEG missing or libturbojpeg not found, fall back to PIL
+    _tj = None
+
+
+def _read_bytes(path):
+    with open(path, 'rb') as f:
+        return f.read()
+
+
+def _load_rgb(image_path, reduce=1, buf=None):
+    """Decode an image into a HxWx3 uint8 RGB ndarray, using libjpeg-turbo for JPEG files if available.
+
+    JPEGs are downscaled by 1/reduce (1, 2, 4 or 8) inside the decoder, skipping most of the IDCT work.
+    buf may hold the file contents if they were already read.
+    """
+    if buf is None:
+        buf = _read_bytes(image_path)
+    if _tj is not None and image_path.endswith('.jpg'):
+        return _tj.decode(buf, pixel_format=TJPF_RGB, scaling_factor=(1, reduce))
+    image = Image.open(io.BytesIO(buf))
+    if reduce > 1:
+        image.draft('RGB', (image.width // reduce, image.height // reduce))
+    return np.asarray(image.convert('RGB'))
+
+
+def _crop(image, x1, y1, x2, y2):
+    """image[y1:y2, x1:x2] where the part of the box outside the image is black, like PIL's Image.crop"""
+    height, width = image.shape[:2]
+    if x1 >= 0 and y1 >= 0 and x2 <= width and y2 <= height:
+        return image[y1:y2, x1:x2]
+    crop = np.zeros((max(y2 - y1, 0), max(x2 - x1, 0)) + image.shape[2:], dtype=image.dtype)
+    sx1, sy1, sx2, sy2 = max(x1, 0), max(y1, 0), min(x2, width), min(y2, height)
+    if sx2 > sx1 and sy2 > sy1:
+        crop[sy1 - y1:sy2 - y1, sx1 - x1:sx2 - x1] = image[sy1:sy2, sx1:sx2]
+    return crop
+
+
+class CustomDataset(Dataset):
+    """this data set accept the data in yolo format
+
+    If cache_shape is given, the transform must be deterministic and return uint8 tensors of that shape. Its outputs
+    are then kept in a shared memory block that the DataLoader workers of all ranks on a node fill and read, so every
+    image is decoded once per node. Local rank 0 creates the block, the other local ranks attach to it by name.
+
+    When the DataLoader fetches whole batches (__getitems__, torch>=2.1), the image files of a batch are read by
+    up to io_depth threads at once, so the disk sees many outstanding requests instead of one read per worker.
+    io_depth=0 reads them one by one.
+    """
+    def __init__(self, image_dir, label_dir, transform=None, img_size=None, cache_shape=None, io_depth=0):
+        self.image_dir = image_dir
+        self.label_dir = label_dir
+        self.transform = transform
+        with os.scandir(image_dir) as it:
+            entries = sorted((e for e in it if e.name.endswith(('.jpg', '.png'))), key=lambda e: e.name)
+        self.image_paths = [e.path for e in entries]
+        self.label_paths = [os.path.join(label_dir, os.path.splitext(e.name)[0] + '.txt') for e in entries]
+
+        # Parse every label file once, __getitem__ then only indexes these arrays
+        labels = np.empty((len(self.image_paths), 5), dtype=np.float64)
+        sizes = np.empty((len(self.image_paths), 2), dtype=np.float64)
+        for i, (image_path, label_path) in enumerate(zip(self.image_paths, self.label_paths)):
+            with open(label_path, 'r') as f:
+                labels[i] = list(map(float, f.readline().split()[:5]))
+            # PIL only parses the header here, the pixels are not decoded
+            with Image.open(image_path) as image:
+                sizes[i] = image.size
+        self.class_ids = labels[:, 0].astype(np.int64)
+        self.labels = labels[:, 1:]
+
+        # Convert normalized (cx, cy, bw, bh) to pixel (x1, y1, x2, y2), boxes may reach past the image border
+        cx, cy, bw, bh = self.labels.T
+        extent = np.tile(sizes, 2)
+        corners = np.stack([cx - bw / 2, cy - bh / 2, cx + bw / 2, cy + bh / 2], axis=1) * extent
+        self.bboxes = corners.astype(np.int64)
+        self.sizes = sizes.astype(np.int64)
+
+        # Largest decoder downscale (1, 2, 4 or 8) that keeps the shorter side of the crop >= img_size
+        self.reduce = np.ones(len(self.image_paths), dtype=np.int64)
+        if img_size is not None:
+            short = np.minimum(self.bboxes[:, 2] - self.bboxes[:, 0], self.bboxes[:, 3] - self.bboxes[:, 1])
+            steps = np.floor(np.log2(np.maximum(short, 1) / img_size))
+            self.reduce = 2 ** np.clip(steps, 0, 3).astype(np.int64)
+
+        self.io_depth = io_depth
+        self._io_pool = None
+        self.cache_shape = cache_shape
+        self._shm = None
+        if cache_shape is not None:
+            self._open_cache()
+            self._attach_cache()
+
+    def _open_cache(self):
+        # one block holding the (N, *cache_shape) crops followed by N "filled" flags, zeroed on creation
+        size = len(self.image_paths) * (int(np.prod(self.cache_shape)) + 1)
+        # same name on every rank of this run, the sorted file list keeps the indices identical across ranks
+        key = f"{os.path.abspath(self.image_dir)}:{self.cache_shape}:{os.environ.get('MASTER_PORT', '')}"
+        name = 'repvgg_' + hashlib.md5(key.encode()).hexdigest()[:16]
+        local_rank = int(os.environ.get('LOCAL_RANK', 0))
+        self._owner_pid = None
+        if local_rank == 0:
+            try:
+                # left over by a run that was killed before it could clean up
+                stale = SharedMemory(name=name)
+                stale.close()
+                stale.unlink()
+            except FileNotFoundError:
+                pass
+            # /dev/shm is a tmpfs, running out of it while filling the block kills the workers with SIGBUS
+            free = shutil.disk_usage('/dev/shm').free
+            assert size <= free, f"SHM cache of {self.image_dir} needs {size / 2 ** 30:.1f}GB but /dev/shm has " \
+                                 f"{free / 2 ** 30:.1f}GB free, enlarge it (docker --shm-size) or disable DATA.SHM_CACHE"
+            self._shm = SharedMemory(name=name, create=True, size=size)
+            self._owner_pid = os.getpid()
+        if dist.is_available() and dist.is_initialized():
+            dist.barrier()
+        if local_rank != 0:
+            self._shm = SharedMemory(name=name)
+            # the block belongs to local rank 0, keep the resource tracker of this rank from unlinking it on exit
+            resource_tracker.unregister(self._shm._name, 'shared_memory')
+
+    def _attach_cache(self):
+        n = len(self.image_paths)
+        self._cache = np.ndarray((n, *self.cache_shape), dtype=np.uint8, buffer=self._shm.buf)
+        self._filled = np.ndarray((n,), dtype=np.uint8, buffer=self._shm.buf, offset=self._cache.nbytes)
+
+    def __getstate__(self):
+        # the views are rebuilt on the shared block instead of being pickled as copies
+        state = self.__dict__.copy()
+        state['_cache'] = state['_filled'] = None
+        state['_io_pool'] = None
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__ = state
+        if self._shm is not None:
+            self._attach_cache()
+
+    def __del__(self):
+        if getattr(self, '_shm', None) is not None:
+            self._cache = self._filled = None
+            self._shm.close()
+            if os.getpid() == self._owner_pid:
+                self._shm.unlink()
+
+    def __len__(self):
+        return len(self.image_paths)
+
+    def __getitem__(self, idx):
+        return self._get(idx)
+
+    def __getitems__(self, indices):
+        if self.io_depth <= 0:
+            return [self._get(i) for i in indices]
+        if self._io_pool is None or self._io_pid != os.getpid():
+            # the pool lives for the whole worker, a batch never needs more threads than it has samples
+            self._io_pool = ThreadPoolExecutor(min(self.io_depth, len(indices)))
+            self._io_pid = os.getpid()
+        to_read = [i for i in indices if self._shm is None or not self._filled[i]]
+        bufs = dict(zip(to_read, self._io_pool.map(_read_bytes, [self.image_paths[i] for i in to_read])))
+        return [self._get(i, bufs.get(i)) for i in indices]
+
+    def _get(self, idx, buf=None):
+        if self._shm is not None and self._filled[idx]:
+            # copy out of the shared block, collate functions such as FastCollateMixup may modify samples in place
+            return torch.from_numpy(self._cache[idx].copy()), int(self.class_ids[idx])
+
+        # Load image and crop face
+        image = _load_rgb(self.image_paths[idx], int(self.reduce[idx]), buf)
+        x1, y1, x2, y2 = self.bboxes[idx]
+        height, width = image.shape[:2]
+        full_width, full_height = self.sizes[idx]
+        if (width, height) != (full_width, full_height):
+            x1, x2 = x1 * width // full_width, x2 * width // full_width
+            y1, y2 = y1 * height // full_height, y2 * height // full_height
+        img = _crop(image, int(x1), int(y1), int(x2), int(y2))
+        class_id = int(self.class_ids[idx])
+
+        if self.transform:
+            img = self.transform(img)
+
+        if self._shm is not None:
+            self._cache[idx] = np.asarray(img)
+            self._filled[idx] = 1
+
+        return img, class_id
+
+
+class MMAPDataset(Dataset):
+    """face crops packed by tools/prepack.py: a (N, size, size, 3) uint8 data.npy and a (N,) labels.npy
+
+    data.npy is memory-mapped, its shape comes from the .npy header so packs of any crop size are read correctly.
+    """
+    def __init__(self, root, transform=None):
+        self.root = root
+        self.transform = transform
+        self._lbl = np.load(os.path.join(root, 'labels.npy'))
+        self._mm = np.load(os.path.join(root, 'data.npy'), mmap_mode='r')
+        assert len(self._mm) == len(self._lbl), f"{root}: data.npy and labels.npy hold different sample counts"
+
+    def __getstate__(self):
+        # pickling the map would copy the whole pack into every spawned worker, reopen it there instead
+        state = self.__dict__.copy()
+        state['_mm'] = None
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__ = state
+        self._mm = np.load(os.path.join(self.root, 'data.npy'), mmap_mode='r')
+
+    def __len__(self):
+        return len(self._lbl)
+
+    def __getitem__(self, idx):
+        # copy the row out of the read-only map so the transform gets a writable array
+        img = np.array(self._mm[idx])
+        if self.transform:
+            img = self.transform(img)
+        return img, int(self._lbl[idx])
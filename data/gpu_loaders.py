@@ -0,0 +1,102 @@
+import torch
+import torch.nn.functional as F
+
+from .tensor_transforms import FusedNormalize
+
+
+class CUDAPrefetcher:
+    """wraps a DataLoader and copies the next batch to the GPU on a side stream while the current one is consumed
+
+    If mean and std are given the loader yields uint8 images, which are converted to float and normalized on the GPU.
+    """
+    def __init__(self, loader, mean=None, std=None):
+        self.loader = loader
+        self.sampler = loader.sampler
+        self.stream = torch.cuda.Stream()
+        self.normalize = None if mean is None else FusedNormalize(mean, std).cuda()
+
+    def __len__(self):
+        return len(self.loader)
+
+    def _preload(self, it):
+        try:
+            samples, targets = next(it)
+        except StopIteration:
+            return None
+        with torch.cuda.stream(self.stream):
+            samples = samples.cuda(non_blocking=True)
+            targets = targets.cuda(non_blocking=True)
+            if self.normalize is not None:
+                samples = self.normalize(samples)
+        return samples, targets
+
+    def __iter__(self):
+        it = iter(self.loader)
+        batch = self._preload(it)
+        while batch is not None:
+            torch.cuda.current_stream().wait_stream(self.stream)
+            samples, targets = batch
+            # the tensors were allocated on the side stream but are consumed on the current one
+            samples.record_stream(torch.cuda.current_stream())
+            targets.record_stream(torch.cuda.current_stream())
+            batch = self._preload(it)
+            yield samples, targets
+
+
+class CUDATensorLoader:
+    """serves a small uint8 (N, H, W, 3) image set held entirely in GPU memory, without a DataLoader
+
+    Batches are gathered, augmented (random crop from the zero-padded image and horizontal flip, when training) and
+    normalized with GPU kernels. Indices come from a DistributedSampler, so sharding and set_epoch work as usual.
+    """
+    def __init__(self, images, targets, batch_size, mean, std, train, num_replicas, rank, padding=4):
+        self.images = torch.from_numpy(images).cuda().permute(0, 3, 1, 2).contiguous()
+        self.targets = torch.as_tensor(targets, dtype=torch.int64).cuda()
+        self.sampler = torch.utils.data.DistributedSampler(range(len(images)), num_replicas=num_replicas,
+                                                           rank=rank, shuffle=train)
+        self.batch_size = batch_size
+        self.train = train
+        self.padding = padding
+        self.normalize = FusedNormalize(mean, std).cuda()
+
+    def __len__(self):
+        if self.train:
+            return len(self.sampler) // self.batch_size
+        return (len(self.sampler) + self.batch_size - 1) // self.batch_size
+
+    def __iter__(self):
+        indices = torch.tensor(list(self.sampler)).cuda()
+        for start in range(0, len(self) * self.batch_size, self.batch_size):
+            idx = indices[start:start + self.batch_size]
+            images = self.images[idx]
+            if self.train:
+                images = self._crop_flip(images)
+            yield self.normalize(images), self.targets[idx]
+
+    def _crop_flip(self, images):
+        # a single gather does the per-sample crop offsets and the flip (reversed column order)
+        n, c, h, w = images.shape
+        p = self.padding
+        padded = F.pad(images, (p, p, p, p))
+        rows = torch.randint(0, 2 * p + 1, (n, 1), device=images.device) + torch.arange(h, device=images.device)
+        cols = torch.randint(0, 2 * p + 1, (n, 1), device=images.device) + torch.arange(w, device=images.device)
+        flip = torch.rand(n, 1, device=images.device) < 0.5
+        cols = torch.where(flip, cols.flip(1), cols)
+        batch = torch.arange(n, device=images.device).view(n, 1, 1, 1)
+        chans = torch.arange(c, device=images.device).view(1, c, 1, 1)
+        return padded[batch, chans, rows.view(n, 1, h, 1), cols.view(n, 1, 1, w)]
+
+
+class DALILoader:
+    """yields (samples, targets) batches from a DALIClassificationIterator, already on the GPU"""
+    def __init__(self, iterator):
+        self.iterator = iterator
+        # sharding and shuffling happen inside the DALI reader
+        self.sampler = None
+
+    def __len__(self):
+        return len(self.iterator)
+
+    def __iter__(self):
+        for batch in self.iterator:
+            yield batch[0]['data'], batch[0]['label'].squeeze(-1).long()
@@ -0,0 +1,44 @@
+import torch
+from torchvision.transforms import v2
+
+
+class FusedNormalize(torch.nn.Module):
+    """(x / 255 - mean) / std on uint8 images as a single multiply-add pass, x * scale + bias"""
+    def __init__(self, mean, std):
+        super().__init__()
+        mean = torch.tensor(mean, dtype=torch.float32).view(-1, 1, 1)
+        std = torch.tensor(std, dtype=torch.float32).view(-1, 1, 1)
+        self.register_buffer('scale', 1 / (255 * std))
+        self.register_buffer('bias', -mean / std)
+
+    def forward(self, x):
+        return torch.addcmul(self.bias, x.float(), self.scale)
+
+
+def compose_scripted(t):
+    """converts the input to a plain tensor, then runs the tensor-only transforms t as one TorchScript module
+    instead of a Python loop over them (v2 transforms script as their v1 equivalents)"""
+    head = [v2.ToImage(), v2.ToPureTensor()]
+    if not t:
+        return v2.Compose(head)
+    return v2.Compose(head + [_ScriptedTransforms(t)])
+
+
+class _ScriptedTransforms:
+    """runs tensor-only transforms as one TorchScript module, scripted on first use in the process that calls it
+
+    Scripted modules cannot be pickled, so only the plain modules travel to spawned DataLoader workers.
+    """
+    def __init__(self, transforms):
+        self.transforms = torch.nn.Sequential(*transforms)
+        self._scripted = None
+
+    def __call__(self, x):
+        if self._scripted is None:
+            self._scripted = torch.jit.script(self.transforms)
+        return self._scripted(x)
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state['_scripted'] = None
+        return state
@@ -0,0 +1,44 @@
+# --------------------------------------------------------
+# RepVGG: Making VGG-style ConvNets Great Again (https://openaccess.thecvf.com/content/CVPR2021/papers/Ding_RepVGG_Making_VGG-Style_ConvNets_Great_Again_CVPR_2021_paper.pdf)
+# Github source: https://github.com/DingXiaoH/RepVGG
+# Licensed under The MIT License [see LICENSE for details]
+# --------------------------------------------------------
+import argparse
+import os
+import sys
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+import numpy as np
+from torchvision.transforms import v2
+from data.custom_dataset import CustomDataset
+
+parser = argparse.ArgumentParser(description='Pack the custom (yolo format) dataset into a memory-mapped file')
+parser.add_argument('data', metavar='DATA', help='path to the dataset, containing train/ and valid/')
+parser.add_argument('--size', default=96, type=int, help='side of the packed crops')
+
+
+def prepack():
+    args = parser.parse_args()
+    transform = v2.Compose([
+        v2.ToImage(),
+        v2.Resize(args.size, antialias=True),
+        v2.CenterCrop(args.size),
+    ])
+    for split in ['train', 'valid']:
+        root = os.path.join(args.data, split)
+        dataset = CustomDataset(image_dir=os.path.join(root, 'images'),
+                                label_dir=os.path.join(root, 'labels'),
+                                transform=transform, img_size=args.size)
+        print("=> packing {} samples of '{}'".format(len(dataset), root))
+        # a .npy file records its shape in the header, so MMAPDataset does not need to know the crop size
+        mm = np.lib.format.open_memmap(os.path.join(root, 'data.npy'), dtype=np.uint8, mode='w+',
+                                       shape=(len(dataset), args.size, args.size, 3))
+        labels = np.empty(len(dataset), dtype=np.int64)
+        for i in range(len(dataset)):
+            img, labels[i] = dataset[i]
+            mm[i] = img.permute(1, 2, 0).numpy()
+        mm.flush()
+        np.save(os.path.join(root, 'labels.npy'), labels)
+
+
+if __name__ == '__main__':
+    prepack()
@@ -35,12 +35,29 @@ _C.DATA.INTERPOLATION = 'bilinear'
 # Use zipped dataset instead of folder dataset
 # could be overwritten by command line argument
 _C.DATA.ZIP_MODE = False
+# Read the ImageNet training set from WebDataset tar shards in <DATA_PATH>/train/*.tar,
+# validation still uses the folder (or zip) dataset
+_C.DATA.WDS_MODE = False
+# Number of training samples in the shards, 0 counts them from the tar headers on rank 0 at startup
+_C.DATA.WDS_TRAIN_SAMPLES = 0
 # Cache Data in Memory, could be overwritten by command line argument
 _C.DATA.CACHE_MODE = 'part'
+# Read the custom dataset from the data.npy/labels.npy files written by tools/prepack.py
+_C.DATA.MMAP_MODE = False
+# Decode and augment ImageNet on the GPU with NVIDIA DALI instead of torchvision
+_C.DATA.USE_DALI = False
+# Ship uint8 crops of the custom dataset and convert/normalize them on the GPU (4x less host to device traffic)
+_C.DATA.GPU_NORMALIZE = True
+# Keep the decoded 96x96 crops of the custom dataset in shared memory after the first epoch. All ranks of a node share
+# one block per split of N * 27KB, it must fit in /dev/shm
+_C.DATA.SHM_CACHE = False
+# Concurrent image reads per DataLoader worker for the custom training set, 0 reads sequentially.
+# Each worker keeps its own thread pool, so a rank runs up to NUM_WORKERS * IO_DEPTH reader threads.
+_C.DATA.IO_DEPTH = 4
 # Pin CPU memory in DataLoader for more efficient (sometimes) transfer to GPU.
 _C.DATA.PIN_MEMORY = True
-# Number of data loading threads
-_C.DATA.NUM_WORKERS = 8
+# Number of data loading threads, -1 picks min(cpu_count // ranks_per_node - 1, 8)
+_C.DATA.NUM_WORKERS = -1
 
 # -----------------------------------------------------------------------------
 # Model settings